@@ -1,81 +1,255 @@
+from functools import lru_cache
+
 import numpy as np
 from scipy.signal import lfilter
 
+try:
+    import audio_utils_nb
+except ImportError:
+    audio_utils_nb = None
+
 SAMPLE_RATE = 44100
 
+__all__ = [
+    'SAMPLE_RATE', 'FREQ_LUT', 'midi_to_freq', 'generate_tone', 'generate_noise', 'synth_note',
+    'apply_envelope', 'apply_pan', 'apply_pan_planar', 'mix_add', 'apply_reverb',
+    'apply_delay', 'apply_chorus', 'apply_phaser', 'apply_stereo_widen',
+    'apply_filter', 'process_effects',
+]
+
+_RNG = np.random.default_rng()
+
+# all 128 MIDI pitches precomputed. FREQ_LUT serves batched gathers
+# (FREQ_LUT[notes_array]); the plain list keeps scalar lookups free of
+# NumPy scalar boxing
+FREQ_LUT = 440.0 * np.exp2((np.arange(128) - 69) / 12.0)
+FREQ_LUT.setflags(write=False)
+_MIDI_FREQ = FREQ_LUT.tolist()
+
 def midi_to_freq(midi_note):
-    return 440 * 2 ** ((midi_note - 69) / 12)
-
-def generate_tone(frequency, duration, instrument='sine', volume=0.2):
-    t = np.linspace(0, duration, int(SAMPLE_RATE * duration), False)
-    if instrument == 'sine':
-        wave = np.sin(2 * np.pi * frequency * t)
-    elif instrument == 'square':
-        wave = np.sign(np.sin(2 * np.pi * frequency * t))
-    elif instrument == 'triangle':
-        wave = 2 * np.arcsin(np.sin(2 * np.pi * frequency * t)) / np.pi
-    elif instrument == 'sawtooth':
-        wave = 2 * (t * frequency - np.floor(0.5 + t * frequency))
-    elif instrument == 'fm_sine':
-        mod_freq = frequency * 2
-        mod_index = 2.0
-        wave = np.sin(2*np.pi*frequency*t + mod_index*np.sin(2*np.pi*mod_freq*t))
-    elif instrument == 'noise_pad':
-        wave = np.random.normal(0, 1, len(t)).astype(np.float32)
-        wave = apply_envelope(wave, attack=0.5, decay=0.7)
-    return (wave * volume).astype(np.float32)
-
-def generate_noise(duration, volume=0.05):
-    n_samples = int(duration * SAMPLE_RATE)
-    return np.random.normal(0, 1, n_samples).astype(np.float32) * volume
+    return _MIDI_FREQ[midi_note]
+
+# integer waveform ids for the fused synth kernel
+_WAVE_IDS = {'sine': 0, 'square': 1, 'triangle': 2, 'sawtooth': 3, 'fm_sine': 4}
+
+# single-cycle wavetables, one per periodic instrument. A single cycle
+# is frequency-independent (the readout step sets the pitch, including
+# fm_sine whose 2:1 modulator is harmonic), so one table serves every
+# note in a scale.
+_WT_SIZE = 2048
+_WAVETABLE = {}
+
+def _wavetable(instrument):
+    table = _WAVETABLE.get(instrument)
+    if table is None:
+        table = np.empty(_WT_SIZE, np.float32)
+        if audio_utils_nb is not None:
+            # one cycle == _WT_SIZE samples at SAMPLE_RATE/_WT_SIZE Hz
+            audio_utils_nb.synth(table, np.float32(SAMPLE_RATE / _WT_SIZE),
+                                 _WAVE_IDS[instrument], np.float32(1.0))
+        else:
+            ph = 2 * np.pi * np.arange(_WT_SIZE) / _WT_SIZE
+            if instrument == 'sine':
+                table[:] = np.sin(ph)
+            elif instrument == 'square':
+                table[:] = np.sign(np.sin(ph))
+            elif instrument == 'triangle':
+                table[:] = (2 / np.pi) * np.arcsin(np.sin(ph))
+            elif instrument == 'sawtooth':
+                x = ph / (2 * np.pi)
+                table[:] = 2 * (x - np.floor(x + 0.5))
+            else:
+                table[:] = np.sin(ph + 2.0 * np.sin(2 * ph))
+        _WAVETABLE[instrument] = table
+    return table
+
+def generate_tone(frequency, duration, instrument='sine', volume=0.2, out=None, sr=SAMPLE_RATE):
+    n_samples = int(sr * duration)
+    if out is None or out.shape[0] != n_samples:
+        out = np.empty(n_samples, np.float32)
+    if instrument in _WAVE_IDS:
+        # pure gather+scale: no transcendentals on the hot path
+        idx = (np.arange(n_samples) * (_WT_SIZE * frequency / sr)).astype(np.int64)
+        idx &= _WT_SIZE - 1
+        np.take(_wavetable(instrument), idx, out=out)
+    else:  # noise_pad
+        _RNG.standard_normal(dtype=np.float32, out=out)
+        out = apply_envelope(out, attack=0.5, decay=0.7)
+    out *= np.float32(volume)
+    return out
+
+@lru_cache(maxsize=64)
+def _note_cached(frequency, n_samples, instrument, volume, attack, decay, sr):
+    # one fully enveloped note, synthesized once and returned read-only:
+    # a scale has only a handful of distinct (pitch, length) notes, so
+    # repeat beats reduce to a cache hit plus one SIMD add
+    tone = np.zeros(n_samples, np.float32)
+    if audio_utils_nb is not None:
+        # attack/decay stay float64 so int(attack*n) rounds exactly like
+        # the NumPy envelope path
+        audio_utils_nb.synth_note(tone, 0, _wavetable(instrument),
+                                  _WT_SIZE * frequency / sr, n_samples,
+                                  np.float32(volume), attack, decay)
+    else:
+        idx = (np.arange(n_samples) * (_WT_SIZE * frequency / sr)).astype(np.int64)
+        idx &= _WT_SIZE - 1
+        tone = _wavetable(instrument)[idx]
+        tone *= np.float32(volume)
+        tone = apply_envelope(tone, attack, decay)
+    tone.setflags(write=False)
+    return tone
+
+def synth_note(out, start, frequency, duration, instrument='sine', volume=0.2,
+               attack=0.1, decay=0.5, sr=SAMPLE_RATE):
+    # fused tone+envelope+accumulate straight into out[start:start+n]:
+    # no per-note temporaries, and identical notes render only once
+    n = int(sr * duration)
+    if instrument in _WAVE_IDS:
+        tone = _note_cached(float(frequency), n, instrument, float(volume),
+                            float(attack), float(decay), sr)
+    else:  # noise_pad draws fresh randomness, never cache it
+        tone = generate_tone(frequency, duration, instrument, volume, sr=sr)
+        tone = apply_envelope(tone, attack, decay)
+    if audio_utils_nb is not None:
+        # saturating accumulate: the clamp rides along with the store,
+        # so callers never need a separate clip pass over the layer
+        audio_utils_nb.add_sat(out, tone, start)
+    else:
+        end = min(start + n, out.shape[0])
+        seg = out[start:end]
+        seg += tone[:end - start]
+        np.clip(seg, -1, 1, out=seg)
+
+def generate_noise(duration, volume=0.05, out=None, sr=SAMPLE_RATE):
+    n_samples = int(duration * sr)
+    if out is None or out.shape[0] != n_samples:
+        out = np.empty(n_samples, np.float32)
+    # fill the buffer in place: no float64 draw + downcast copy
+    _RNG.standard_normal(dtype=np.float32, out=out)
+    out *= np.float32(volume)
+    return out
+
+_ENV_CACHE = {}
 
 def apply_envelope(signal, attack=0.1, decay=0.5):
     n_samples = len(signal)
-    env = np.ones(n_samples)
-    attack_samples = int(attack * n_samples)
-    decay_samples = int(decay * n_samples)
-    if attack_samples > 0:
-        env[:attack_samples] = np.linspace(0, 1, attack_samples)
-    if decay_samples > 0:
-        env[-decay_samples:] = np.linspace(1, 0, decay_samples)
+    key = (n_samples, attack, decay)
+    env = _ENV_CACHE.get(key)
+    if env is None:
+        attack_samples = int(attack * n_samples)
+        decay_samples = int(decay * n_samples)
+        env = np.empty(n_samples, dtype=np.float32)
+        env[:attack_samples] = np.linspace(0, 1, attack_samples, dtype=np.float32)
+        env[attack_samples:n_samples - decay_samples] = 1.0
+        env[n_samples - decay_samples:] = np.linspace(1, 0, decay_samples, dtype=np.float32)
+        if len(_ENV_CACHE) >= 4:
+            _ENV_CACHE.pop(next(iter(_ENV_CACHE)))
+        _ENV_CACHE[key] = env
+    if signal.dtype == np.float32:
+        return np.multiply(signal, env, out=signal)
     return signal * env
 
-def apply_pan(signal, pan=0.0):
-    left = signal * (1 - pan) / 2
-    right = signal * (1 + pan) / 2
-    return np.stack([left, right], axis=1)
-
-def apply_reverb(signal, decay=0.3, delay_time=0.03):
-    delay_samples = int(SAMPLE_RATE * delay_time)
-    output = np.copy(signal)
-    for i in range(delay_samples, len(signal)):
-        output[i] += signal[i - delay_samples] * decay
-    return np.clip(output, -1, 1)
-
-def apply_delay(signal, delay_time=0.2, feedback=0.3):
-    delay_samples = int(SAMPLE_RATE * delay_time)
-    output = np.copy(signal)
-    for i in range(delay_samples, len(signal)):
-        output[i] += output[i - delay_samples] * feedback
-    return np.clip(output, -1, 1)
-
-def apply_chorus(signal, depth=0.003, rate=0.25):
-    n_samples = len(signal)
-    output = np.copy(signal)
-    delay_samples = int(depth * SAMPLE_RATE)
-    for i in range(delay_samples, n_samples):
-        mod = int(delay_samples * np.sin(2*np.pi*rate*i/SAMPLE_RATE))
-        output[i] += 0.5 * signal[i-mod]
-    return np.clip(output, -1, 1)
-
-def apply_phaser(signal, rate=0.2, depth=0.02):
-    n_samples = len(signal)
-    output = np.copy(signal)
-    for i in range(n_samples):
-        shift = int(depth * SAMPLE_RATE * np.sin(2*np.pi*rate*i/SAMPLE_RATE))
-        if i-shift >=0:
-            output[i] += signal[i-shift]
-    return np.clip(output, -1, 1)
+def apply_pan(signal, pan=0.0, out=None):
+    # two column writes into the interleaved buffer instead of
+    # left/right temporaries plus a stack copy
+    if out is None:
+        out = np.empty((signal.shape[0], 2), np.float32)
+    np.multiply(signal, (1 - pan) * 0.5, out=out[:, 0])
+    np.multiply(signal, (1 + pan) * 0.5, out=out[:, 1])
+    return out
+
+def apply_pan_planar(signal, pan=0.0, out=None):
+    # planar (2,N) variant: two stride-1 writes, no interleave copy
+    if out is None:
+        out = np.empty((2, signal.shape[0]), np.float32)
+    np.multiply(signal, (1 - pan) * 0.5, out=out[0])
+    np.multiply(signal, (1 + pan) * 0.5, out=out[1])
+    return out
+
+def mix_add(out, layer, env, gl, gr):
+    # accumulate a mono layer into an interleaved (N,2) mix in one fused
+    # pass: per-sample envelope, pan gains, accumulate
+    if audio_utils_nb is not None:
+        audio_utils_nb.mix_add(out, layer, env, np.float32(gl), np.float32(gr))
+    else:
+        m = layer * env
+        out[:, 0] += np.float32(gl) * m
+        out[:, 1] += np.float32(gr) * m
+
+# coefficient construction is memoized: slider values only change
+# occasionally, so steady-state chunks reuse the same arrays (returned
+# read-only so a cache hit can't be mutated by a caller)
+
+@lru_cache(maxsize=64)
+def _onepole_coeffs(filter_type, cutoff, sr):
+    omega = 2 * np.pi * cutoff / sr
+    a1 = (omega - 1) / (omega + 1)
+    if filter_type == 'low':
+        return omega / (omega + 1), 0.0, a1
+    return 1 / (omega + 1), -1 / (omega + 1), a1
+
+def apply_reverb(signal, decay=0.3, delay_time=0.03, sr=SAMPLE_RATE):
+    # sparse FIR comb y[n] = x[n] + decay*x[n-D]: one shifted
+    # multiply-add, O(N) instead of lfilter's O(N*D) dense convolution
+    delay_samples = int(sr * delay_time)
+    out = signal.astype(np.float32, copy=True)
+    if 0 < delay_samples < signal.shape[0]:
+        out[delay_samples:] += np.float32(decay) * signal[:-delay_samples]
+    return out
+
+def apply_delay(signal, delay_time=0.2, feedback=0.3, sr=SAMPLE_RATE):
+    # sparse feedback comb y[n] = x[n] + feedback*y[n-D]: the recursion
+    # only reaches D samples back, so it runs as N/D vectorized
+    # block-adds instead of lfilter's O(N*D) dense recursion
+    delay_samples = int(sr * delay_time)
+    out = signal.astype(np.float32, copy=True)
+    fb = np.float32(feedback)
+    n = out.shape[0]
+    for s in range(delay_samples, n, delay_samples):
+        e = min(s + delay_samples, n)
+        out[s:e] += fb * out[s - delay_samples:e - delay_samples]
+    return out
+
+def apply_chorus(signal, depth=0.003, rate=0.25, out=None, sr=SAMPLE_RATE):
+    if audio_utils_nb is not None:
+        kernel = audio_utils_nb.chorus_stereo if signal.ndim == 2 else audio_utils_nb.chorus
+        sig = np.ascontiguousarray(signal, dtype=np.float32)
+        if out is None:
+            out = np.empty_like(sig)
+        # kernels bake in SAMPLE_RATE, so rescale the time-domain args
+        # when running at another rate (same samples either way)
+        kernel(sig, np.float32(depth * sr / SAMPLE_RATE),
+               np.float32(rate * SAMPLE_RATE / sr), out)
+        return out
+    else:
+        # vectorized gather: compute all modulated tap indices in one pass
+        n_samples = len(signal)
+        delay_samples = int(depth * sr)
+        idx = np.arange(n_samples, dtype=np.int64)
+        mod = (delay_samples * np.sin((2*np.pi*rate/sr) * idx)).astype(np.int64)
+        src = np.clip(idx - mod, 0, n_samples - 1)
+        output = signal.copy()
+        output[delay_samples:] += 0.5 * signal[src[delay_samples:]]
+    return output
+
+def apply_phaser(signal, rate=0.2, depth=0.02, out=None, sr=SAMPLE_RATE):
+    if audio_utils_nb is not None:
+        kernel = audio_utils_nb.phaser_stereo if signal.ndim == 2 else audio_utils_nb.phaser
+        sig = np.ascontiguousarray(signal, dtype=np.float32)
+        if out is None:
+            out = np.empty_like(sig)
+        kernel(sig, np.float32(rate * SAMPLE_RATE / sr),
+               np.float32(depth * sr / SAMPLE_RATE), out)
+        return out
+    else:
+        n_samples = len(signal)
+        idx = np.arange(n_samples, dtype=np.int64)
+        shift = (depth * sr * np.sin((2*np.pi*rate/sr) * idx)).astype(np.int64)
+        src = idx - shift
+        valid = (src >= 0) & (src < n_samples)
+        output = signal.copy()
+        output[valid] += signal[src[valid]]
+    return output
 
 def apply_stereo_widen(signal, amount=0.3):
     left = signal[:,0]
@@ -86,34 +260,63 @@ def apply_stereo_widen(signal, amount=0.3):
     new_right = mid - side
     return np.stack([new_left,new_right],axis=1)
 
-def apply_filter(signal, filter_type='low', cutoff=1000):
-    omega = 2 * np.pi * cutoff / SAMPLE_RATE
-    if filter_type == 'low':
-        b = [omega / (omega + 1)]
-        a = [1, (omega - 1) / (omega + 1)]
-    else:
-        b = [1 / (omega + 1), -1 / (omega + 1)]
-        a = [1, (omega - 1) / (omega + 1)]
-    return lfilter(b,a,signal,axis=0)
+def apply_filter(signal, filter_type='low', cutoff=1000, out=None, state=None, sr=SAMPLE_RATE):
+    # passthrough when the cutoff can't shape the band (untouched sliders)
+    if filter_type == 'low' and cutoff >= sr * 0.49:
+        return signal
+    if filter_type == 'high' and cutoff <= 25:
+        return signal
+    b0, b1, a1 = _onepole_coeffs(filter_type, cutoff, sr)
+    if audio_utils_nb is not None and signal.ndim == 2:
+        sig = np.ascontiguousarray(signal, dtype=np.float32)
+        if out is None:
+            out = np.empty_like(sig)
+        # per-filter state dict entry persists yL/yR/x1 across chunks so
+        # consecutive chunks filter as one continuous stream
+        zi = None if state is None else state.get(filter_type)
+        if zi is None:
+            zi = np.zeros(4, np.float32)
+            if state is not None:
+                state[filter_type] = zi
+        audio_utils_nb.onepole_stereo(sig, np.float32(b0), np.float32(b1), np.float32(a1), zi, out)
+        return out
+    b = [b0] if filter_type == 'low' else [b0, b1]
+    if state is not None and signal.ndim == 2:
+        key = ('lfilter', filter_type)
+        zi = state.get(key)
+        if zi is None:
+            zi = np.zeros((1, signal.shape[1]))
+        y, state[key] = lfilter(b, [1, a1], signal, axis=0, zi=zi)
+        return y
+    return lfilter(b, [1, a1], signal, axis=0)
 
 def process_effects(chunk, reverb_amount=0.3, delay_amount=0.3, lowpass_cutoff=15000, highpass_cutoff=20,
-                    chorus_amount=0.0, phaser_amount=0.0, stereo_widen=0.0):
+                    chorus_amount=0.0, phaser_amount=0.0, stereo_widen=0.0, scratch=None,
+                    filter_state=None, sr=SAMPLE_RATE):
+    # effects run on the whole (N,2) chunk at once, both channels per call.
+    # chunk and scratch ping-pong between stages so steady-state playback
+    # reuses the same two buffers (scratch must not alias chunk).
+    if chunk.dtype != np.float32:
+        chunk = chunk.astype(np.float32)
+    if scratch is None or scratch.shape != chunk.shape or scratch.dtype != np.float32:
+        scratch = np.empty(chunk.shape, np.float32)
     if reverb_amount>0:
-        chunk[:,0]=apply_reverb(chunk[:,0],decay=reverb_amount)
-        chunk[:,1]=apply_reverb(chunk[:,1],decay=reverb_amount)
+        chunk=apply_reverb(chunk,decay=reverb_amount,sr=sr)
     if delay_amount>0:
-        chunk[:,0]=apply_delay(chunk[:,0],feedback=delay_amount)
-        chunk[:,1]=apply_delay(chunk[:,1],feedback=delay_amount)
+        chunk=apply_delay(chunk,feedback=delay_amount,sr=sr)
     if chorus_amount>0:
-        chunk[:,0]=apply_chorus(chunk[:,0],depth=0.003,rate=0.25*chorus_amount)
-        chunk[:,1]=apply_chorus(chunk[:,1],depth=0.003,rate=0.25*chorus_amount)
+        result=apply_chorus(chunk,depth=0.003,rate=0.25*chorus_amount,out=scratch,sr=sr)
+        chunk, scratch = result, chunk
     if phaser_amount>0:
-        chunk[:,0]=apply_phaser(chunk[:,0],rate=0.2*phaser_amount,depth=0.02*phaser_amount)
-        chunk[:,1]=apply_phaser(chunk[:,1],rate=0.2*phaser_amount,depth=0.02*phaser_amount)
+        result=apply_phaser(chunk,rate=0.2*phaser_amount,depth=0.02*phaser_amount,out=scratch,sr=sr)
+        chunk, scratch = result, chunk
     if stereo_widen>0:
         chunk=apply_stereo_widen(chunk,stereo_widen)
-    if lowpass_cutoff>20:
-        chunk=apply_filter(chunk,'low',lowpass_cutoff)
-    if highpass_cutoff>20:
-        chunk=apply_filter(chunk,'high',highpass_cutoff)
-    return np.clip(chunk,-1,1)
+    if 20<lowpass_cutoff<sr*0.49:
+        result=apply_filter(chunk,'low',lowpass_cutoff,out=scratch,state=filter_state,sr=sr)
+        chunk, scratch = result, chunk
+    if highpass_cutoff>25:
+        result=apply_filter(chunk,'high',highpass_cutoff,out=scratch,state=filter_state,sr=sr)
+        chunk, scratch = result, chunk
+    # saturate once at the end: intermediate clips were redundant passes
+    return np.clip(chunk,-1,1,out=chunk)
@@ -0,0 +1,250 @@
+import math
+import numpy as np
+
+SAMPLE_RATE = 44100
+
+# Kernel bodies are plain functions so they can be either AOT-compiled
+# into the audio_kernels extension (python audio_utils_nb.py) or
+# njit-wrapped at import time. All kernels write into a caller-supplied
+# out buffer (must not alias the input) so the steady-state audio path
+# can reuse preallocated scratch.
+
+def _chorus(signal, depth, rate, out):
+    n = signal.shape[0]
+    out[:] = signal
+    delay_samples = int(depth * SAMPLE_RATE)
+    dphase = 2 * math.pi * rate / SAMPLE_RATE
+    # sin via rotation recurrence: no transcendentals in the loop
+    c = math.cos(dphase)
+    s = math.sin(dphase)
+    cn = math.cos(dphase * delay_samples)
+    sn = math.sin(dphase * delay_samples)
+    for i in range(delay_samples, n):
+        mod = int(delay_samples * sn)
+        # clamp like the NumPy fallback: a negative LFO swing pushes the
+        # tap past the end of the buffer
+        j = i - mod
+        if j < 0:
+            j = 0
+        elif j >= n:
+            j = n - 1
+        out[i] += 0.5 * signal[j]
+        cn2 = cn * c - sn * s
+        sn = sn * c + cn * s
+        cn = cn2
+
+def _chorus_stereo(signal, depth, rate, out):
+    n = signal.shape[0]
+    ch = signal.shape[1]
+    out[:] = signal
+    delay_samples = int(depth * SAMPLE_RATE)
+    dphase = 2 * math.pi * rate / SAMPLE_RATE
+    rc = math.cos(dphase)
+    rs = math.sin(dphase)
+    cn = math.cos(dphase * delay_samples)
+    sn = math.sin(dphase * delay_samples)
+    for i in range(delay_samples, n):
+        mod = int(delay_samples * sn)
+        j = i - mod
+        if j < 0:
+            j = 0
+        elif j >= n:
+            j = n - 1
+        for c in range(ch):
+            out[i, c] += 0.5 * signal[j, c]
+        cn2 = cn * rc - sn * rs
+        sn = sn * rc + cn * rs
+        cn = cn2
+
+def _add_sat(out, x, start):
+    # saturating accumulate: clamp fused with the store, so layers never
+    # need a separate full-buffer clip pass
+    n = x.shape[0]
+    total = out.shape[0]
+    if start + n > total:
+        n = total - start
+    for i in range(n):
+        s = out[start + i] + x[i]
+        if s > 1.0:
+            s = 1.0
+        elif s < -1.0:
+            s = -1.0
+        out[start + i] = s
+
+def _mix_add(out, layer, env, gl, gr):
+    # accumulate a mono layer into an interleaved (N,2) mix: per-sample
+    # envelope and pan gains fused in one pass
+    n = out.shape[0]
+    for i in range(n):
+        m = layer[i] * env[i]
+        out[i, 0] += gl * m
+        out[i, 1] += gr * m
+
+def _onepole_stereo(x, b0, b1, a1, state, out):
+    # y[n] = b0*x[n] + b1*x[n-1] - a1*y[n-1]. state = [yL, yR, xL1, xR1]
+    # carried across chunks so streamed audio filters as one continuous
+    # signal (no boundary transients)
+    n = x.shape[0]
+    yL = state[0]
+    yR = state[1]
+    xL1 = state[2]
+    xR1 = state[3]
+    for i in range(n):
+        xL = x[i, 0]
+        xR = x[i, 1]
+        yL = b0 * xL + b1 * xL1 - a1 * yL
+        yR = b0 * xR + b1 * xR1 - a1 * yR
+        out[i, 0] = yL
+        out[i, 1] = yR
+        xL1 = xL
+        xR1 = xR
+    state[0] = yL
+    state[1] = yR
+    state[2] = xL1
+    state[3] = xR1
+
+def _synth(out, freq, wave_id, volume):
+    # fused phase + waveform + volume, one pass, no temporaries.
+    # wave_id: 0 sine, 1 square, 2 triangle, 3 sawtooth, 4 fm_sine
+    n = out.shape[0]
+    w = 2 * math.pi * freq / SAMPLE_RATE
+    if wave_id == 0:
+        for i in range(n):
+            out[i] = volume * math.sin(w * i)
+    elif wave_id == 1:
+        for i in range(n):
+            out[i] = volume * math.copysign(1.0, math.sin(w * i))
+    elif wave_id == 2:
+        k = volume * 2.0 / math.pi
+        for i in range(n):
+            out[i] = k * math.asin(math.sin(w * i))
+    elif wave_id == 3:
+        cps = freq / SAMPLE_RATE
+        for i in range(n):
+            x = cps * i
+            out[i] = volume * 2.0 * (x - math.floor(x + 0.5))
+    else:
+        # carrier at freq, 2:1 modulator, index 2 (matches fm_sine)
+        wm = 2.0 * w
+        for i in range(n):
+            out[i] = volume * math.sin(w * i + 2.0 * math.sin(wm * i))
+
+def _synth_note(out, start, table, step, n, volume, attack, decay):
+    # fused note: wavetable readout, trapezoid envelope and accumulate
+    # into out[start:start+n] in one pass, no per-note temporaries.
+    # step is the table index advance per sample (_WT_SIZE*freq/sr)
+    # envelope ramps follow the full note length n; only the write is
+    # truncated at the buffer edge (same as slicing an enveloped tone)
+    attack_n = int(attack * n)
+    decay_n = int(decay * n)
+    decay_start = n - decay_n
+    inv_a = 1.0 / (attack_n - 1) if attack_n > 1 else 0.0
+    inv_d = 1.0 / (decay_n - 1) if decay_n > 1 else 0.0
+    total = out.shape[0]
+    if start + n > total:
+        n = total - start
+    if n <= 0:
+        return
+    # branchless integer phase: one wrapping uint32 add + shift per
+    # sample instead of a float multiply and cast (phase wraps mod 2^32
+    # = one table cycle)
+    bits = 0
+    while (1 << bits) < table.shape[0]:
+        bits += 1
+    shift = np.uint32(32 - bits)
+    inc = np.uint32(step / table.shape[0] * 4294967296.0)
+    phase = np.uint32(0)
+    for i in range(n):
+        w = volume * table[phase >> shift]
+        phase = np.uint32(phase + inc)
+        # decay checked first: it overwrites any attack/decay overlap,
+        # matching the order apply_envelope writes its ramps
+        if i >= decay_start:
+            env = 1.0 - (i - decay_start) * inv_d
+        elif i < attack_n:
+            env = i * inv_a
+        else:
+            env = 1.0
+        out[start + i] += w * env
+
+def _phaser(signal, rate, depth, out):
+    n = signal.shape[0]
+    out[:] = signal
+    max_shift = int(depth * SAMPLE_RATE)
+    dphase = 2 * math.pi * rate / SAMPLE_RATE
+    c = math.cos(dphase)
+    s = math.sin(dphase)
+    cn = 1.0
+    sn = 0.0
+    for i in range(n):
+        shift = int(max_shift * sn)
+        j = i - shift
+        if 0 <= j < n:
+            out[i] += signal[j]
+        cn2 = cn * c - sn * s
+        sn = sn * c + cn * s
+        cn = cn2
+
+def _phaser_stereo(signal, rate, depth, out):
+    n = signal.shape[0]
+    ch = signal.shape[1]
+    out[:] = signal
+    max_shift = int(depth * SAMPLE_RATE)
+    dphase = 2 * math.pi * rate / SAMPLE_RATE
+    rc = math.cos(dphase)
+    rs = math.sin(dphase)
+    cn = 1.0
+    sn = 0.0
+    for i in range(n):
+        shift = int(max_shift * sn)
+        j = i - shift
+        if 0 <= j < n:
+            for c in range(ch):
+                out[i, c] += signal[j, c]
+        cn2 = cn * rc - sn * rs
+        sn = sn * rc + cn * rs
+        cn = cn2
+
+_SIGNATURES = {
+    'add_sat': 'void(float32[:], float32[:], int64)',
+    'chorus': 'void(float32[:], float32, float32, float32[:])',
+    'chorus_stereo': 'void(float32[:,:], float32, float32, float32[:,:])',
+    'mix_add': 'void(float32[:,:], float32[:], float32[:], float32, float32)',
+    'onepole_stereo': 'void(float32[:,:], float32, float32, float32, float32[:], float32[:,:])',
+    'phaser': 'void(float32[:], float32, float32, float32[:])',
+    'phaser_stereo': 'void(float32[:,:], float32, float32, float32[:,:])',
+    'synth': 'void(float32[:], float32, int64, float32)',
+    'synth_note': 'void(float32[:], int64, float32[:], float64, int64, float32, float64, float64)',
+}
+
+try:
+    # prebuilt extension (python audio_utils_nb.py): no JIT at runtime
+    from audio_kernels import add_sat, chorus, chorus_stereo, mix_add, onepole_stereo, phaser, phaser_stereo, synth, synth_note
+except ImportError:
+    # JIT fallback: eager float32 signatures compile (and cache) at
+    # import time instead of stalling the first stream_chunk call
+    from numba import njit, types
+    # add_sat's source argument is the read-only cached note, which the
+    # string signature form can't express
+    add_sat = njit(types.void(types.float32[::1],
+                              types.Array(types.float32, 1, 'C', readonly=True),
+                              types.int64),
+                   cache=True, fastmath=True)(_add_sat)
+    chorus = njit(_SIGNATURES['chorus'], cache=True, fastmath=True)(_chorus)
+    chorus_stereo = njit(_SIGNATURES['chorus_stereo'], cache=True, fastmath=True)(_chorus_stereo)
+    mix_add = njit(_SIGNATURES['mix_add'], cache=True, fastmath=True)(_mix_add)
+    onepole_stereo = njit(_SIGNATURES['onepole_stereo'], cache=True, fastmath=True)(_onepole_stereo)
+    phaser = njit(_SIGNATURES['phaser'], cache=True, fastmath=True)(_phaser)
+    phaser_stereo = njit(_SIGNATURES['phaser_stereo'], cache=True, fastmath=True)(_phaser_stereo)
+    synth = njit(_SIGNATURES['synth'], cache=True, fastmath=True)(_synth)
+    synth_note = njit(_SIGNATURES['synth_note'], cache=True, fastmath=True)(_synth_note)
+
+if __name__ == '__main__':
+    # AOT-compile the kernels into audio_kernels.so next to this file so
+    # application start pays no LLVM cost at all
+    from numba.pycc import CC
+    cc = CC('audio_kernels')
+    for _name, _sig in _SIGNATURES.items():
+        cc.export(_name, _sig)(globals()['_' + _name])
+    cc.compile()
+    print('built audio_kernels extension')
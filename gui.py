@@ -1,22 +1,39 @@
 import sys
 import numpy as np
 import os
-import random
+import queue
 import json
+import subprocess
+import threading
 from PyQt6.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QPushButton, QSlider, QLabel, QComboBox, QFileDialog, QCheckBox, QComboBox
+    QApplication, QWidget, QVBoxLayout, QPushButton, QSlider, QLabel, QComboBox, QFileDialog, QCheckBox
 )
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, QObject, QRunnable, QThreadPool, pyqtSignal
 import sounddevice as sd
+import soundfile as sf
 from scipy.io.wavfile import write
-from pydub import AudioSegment
 
-from audio_utils import process_effects, apply_pan, SAMPLE_RATE
+from audio_utils import process_effects, mix_add, SAMPLE_RATE
 from procedural_generator import generate_procedural_chunk, SCALES
-from lfo import LFO, LayerLFO
+from lfo import LFOBank
 
 DURATION_CHUNK = 5  # seconds per chunk
 
+# LFOBank lane layout: the six global parameter lanes, then a
+# volume/pan/timbre triplet per layer starting at LFO_LAYER0
+LFO_TEMPO, LFO_REVERB, LFO_DELAY, LFO_CHORUS, LFO_PHASER, LFO_STEREO = range(6)
+LFO_LAYER0 = 6
+
+# random-scene ranges for every bank lane, in lane order
+_LFO_FREQ_LO = np.array([0.002, 0.001, 0.001, 0.0005, 0.0005, 0.0005]
+                        + [0.0005, 0.0002, 0.0001] * 4, np.float32)
+_LFO_FREQ_HI = np.array([0.01, 0.005, 0.005, 0.003, 0.003, 0.003]
+                        + [0.005, 0.003, 0.003] * 4, np.float32)
+_LFO_DEPTH_LO = np.array([5, 0.2, 0.2, 0.1, 0.1, 0.1]
+                         + [0.1, 0.3, 0.1] * 4, np.float32)
+_LFO_DEPTH_HI = np.array([25, 0.6, 0.6, 0.5, 0.5, 0.5]
+                         + [0.5, 0.7, 0.5] * 4, np.float32)
+
 INSTRUMENTS = ['sine', 'square', 'triangle', 'sawtooth', 'fm_sine', 'noise_pad']
 
 PRESET_FOLDER = "presets"
@@ -24,22 +41,101 @@ PRESET_FOLDER = "presets"
 if not os.path.exists(PRESET_FOLDER):
     os.makedirs(PRESET_FOLDER)
 
+def _mp3_pipe(filename, sr=SAMPLE_RATE):
+    """Persistent ffmpeg process consuming s16le PCM on stdin."""
+    return subprocess.Popen(
+        ['ffmpeg', '-y', '-f', 's16le', '-ar', str(sr), '-ac', '2',
+         '-i', 'pipe:0', '-codec:a', 'libmp3lame', '-q:a', '4', filename],
+        stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def _encode_mp3(pcm_int16, filename, sr=SAMPLE_RATE):
+    """Pipe raw PCM straight into ffmpeg - no WAV re-read, no pydub."""
+    proc = _mp3_pipe(filename, sr)
+    proc.stdin.write(pcm_int16.tobytes())
+    proc.stdin.close()
+    proc.wait()
+
+class _Mp3EncodeTask(QRunnable):
+    """Runs the ffmpeg encode on the global thread pool so saving a long
+    recording never freezes the GUI."""
+    def __init__(self, pcm_int16, filename, sr=SAMPLE_RATE):
+        super().__init__()
+        self.pcm = pcm_int16
+        self.filename = filename
+        self.sr = sr
+
+    def run(self):
+        try:
+            _encode_mp3(self.pcm, self.filename, self.sr)
+            print(f"MP3 version saved: {self.filename}")
+        except Exception as e:
+            print(f"MP3 encode failed: {e}")
+
+class _ExportSignals(QObject):
+    progress = pyqtSignal(int)
+    scene = pyqtSignal()
+    finished = pyqtSignal(str)
+
+class _ExportWorker(QRunnable):
+    """Renders a full session on the thread pool so the GUI never blocks;
+    progress and scene changes flow back through queued signals."""
+    def __init__(self, fn, filename, total_duration):
+        super().__init__()
+        self.signals = _ExportSignals()
+        self._fn = fn
+        self._filename = filename
+        self._total = total_duration
+
+    def run(self):
+        try:
+            self._fn(self.signals, self._filename, self._total)
+        except Exception as e:
+            print(f"Export failed: {e}")
+            self.signals.finished.emit(self._filename)
+
 class ProceduralMusicApp(QWidget):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Cinematic Procedural Ambient DAW")
         self.layout = QVBoxLayout()
 
-        self.init_ui()
-        self.init_lfos()
-        self.init_audio_stream()
-        self.connect_signals()
+        self._presets_mtime = 0
+        self._presets_cache = []
 
-        self.recording_buffer = []
+        # plain state first: init_ui/connect_signals read tempo and the
+        # scene fields while building the widgets
+        self.rng = np.random.default_rng()
+        self._rec_buf = None
+        self._rec_pos = 0
         self.time_accumulator = 0.0
         self.audio_stream = None
         self.tempo = 60
 
+        # reusable effects scratch so steady-state playback doesn't allocate
+        self._fx_scratch = np.empty((SAMPLE_RATE * DURATION_CHUNK, 2), np.float32)
+        # persistent mono layer buffers for the generator (drone, chords,
+        # melody, noise)
+        self._layer_bufs = [np.empty(SAMPLE_RATE * DURATION_CHUNK, np.float32)
+                            for _ in range(4)]
+        # layers accumulate straight into this interleaved mix buffer
+        self._mix = np.zeros((SAMPLE_RATE * DURATION_CHUNK, 2), np.float32)
+        # lowpass/highpass state carried between chunks (click-free seams)
+        self._filter_state = {}
+
+        # producer thread hands finished chunks to the GUI thread via a
+        # bounded queue; the thread only reads self._params, never widgets
+        self._chunk_q = queue.Queue(maxsize=4)
+        self._producer_running = False
+        self._producer_thread = None
+        self._exporting = False
+        self._active_sr = SAMPLE_RATE
+        self._params = {}
+
+        # rolling playback state consumed by the sounddevice callback
+        self._play_buf = None
+        self._play_pos = 0
+        self._recording = False
+
         self.scenes = []
         self.random_scene_enabled = False
         self.current_scene_index = 0
@@ -47,8 +143,13 @@ class ProceduralMusicApp(QWidget):
         self.scene_timer = 0.0
         self.auto_scene_enabled = False
 
+        self.init_ui()
+        self.init_lfos()
+        self.init_audio_stream()
+        self.connect_signals()
+
         self.timer = QTimer()
-        self.timer.timeout.connect(self.stream_chunk)
+        self.timer.timeout.connect(self._scene_tick)
 
     def init_ui(self):
         
@@ -140,6 +241,15 @@ class ProceduralMusicApp(QWidget):
         self.preview_btn.setCheckable(True)
         self.layout.addWidget(self.preview_btn)
 
+        # low quality halves the preview sample rate (half the samples to
+        # synthesize); takes effect on preview restart. Recordings are
+        # captured and saved at the preview rate; export always renders
+        # at 44.1 kHz
+        self.preview_quality_combo = QComboBox()
+        self.preview_quality_combo.addItems(["High (44.1 kHz)", "Low (22 kHz)"])
+        self.layout.addWidget(QLabel("Preview Quality"))
+        self.layout.addWidget(self.preview_quality_combo)
+
         self.record_btn = QPushButton("Start/Stop Recording")
         self.record_btn.setCheckable(True)
         self.layout.addWidget(self.record_btn)
@@ -173,22 +283,15 @@ class ProceduralMusicApp(QWidget):
         self.setLayout(self.layout)
 
     def init_lfos(self):
-        # LFOs for evolving preset parameters
-        self.lfo_tempo = LFO(rate=0.005, amplitude=20)  # BPM modulation
-        self.lfo_reverb = LFO(rate=0.002, amplitude=0.5)  # Reverb modulation
-        self.lfo_delay = LFO(rate=0.002, amplitude=0.5)   # Delay modulation
-        self.lfo_chorus = LFO(rate=0.001, amplitude=0.5)
-        self.lfo_phaser = LFO(rate=0.001, amplitude=0.5)
-        self.lfo_stereo = LFO(rate=0.001, amplitude=0.5)
-        # LFOs per instrument layer
-        self.layer_lfos = []
+        # one SoA bank for every LFO in the app: lanes 0-5 modulate the
+        # evolving preset parameters, then a volume/pan/timbre triplet
+        # per layer. step_all advances all 18 lanes in one dispatch.
+        freqs = [0.005, 0.002, 0.002, 0.001, 0.001, 0.001]
+        depths = [20, 0.5, 0.5, 0.5, 0.5, 0.5]
         for i in range(4):  # 4 layers: drone, chords, melody, noise
-            lfo = {
-                "volume": LFO(rate=0.001 + 0.001*i, amplitude=0.3),  # Different speeds
-                "pan": LFO(rate=0.0005 + 0.0005*i, amplitude=0.5),
-                "timbre": LFO(rate=0.0007 + 0.0003*i, amplitude=0.5)  # For FM/Noise modulation
-            }
-            self.layer_lfos.append(lfo)
+            freqs += [0.001 + 0.001*i, 0.0005 + 0.0005*i, 0.0007 + 0.0003*i]
+            depths += [0.3, 0.5, 0.5]
+        self.lfo_bank = LFOBank(freqs, depths)
 
     def init_audio_stream(self):
         self.audio_stream = None
@@ -206,145 +309,252 @@ class ProceduralMusicApp(QWidget):
         self.random_scene_toggle.stateChanged.connect(self.toggle_random_scene)
         self.export_btn.clicked.connect(self.export_full_session)
 
+        # keep the producer-thread snapshot in sync with the widgets
+        for slider in (self.tempo_slider, self.reverb_slider, self.delay_slider,
+                       self.chorus_slider, self.phaser_slider, self.stereo_slider,
+                       self.lowpass_slider, self.highpass_slider):
+            slider.valueChanged.connect(self._snapshot_params)
+        self.scale_combo.currentTextChanged.connect(self._snapshot_params)
+        self.inst_combo.currentTextChanged.connect(self._snapshot_params)
+        self.arpeggio_toggle.stateChanged.connect(self._snapshot_params)
+        self.evolving_toggle.stateChanged.connect(self._snapshot_params)
+        self._snapshot_params()
+
+    def _snapshot_params(self):
+        """Copy widget values into a plain dict the producer thread can read."""
+        self._params = {
+            "tempo": self.tempo_slider.value(),
+            "scale": self.scale_combo.currentText(),
+            "instrument": self.inst_combo.currentText(),
+            "use_arpeggio": self.arpeggio_toggle.isChecked(),
+            "reverb": self.reverb_slider.value() / 100,
+            "delay": self.delay_slider.value() / 100,
+            "chorus": self.chorus_slider.value() / 100,
+            "phaser": self.phaser_slider.value() / 100,
+            "stereo_widen": self.stereo_slider.value() / 100,
+            "lowpass": self.lowpass_slider.value(),
+            "highpass": self.highpass_slider.value(),
+            "evolving": self.evolving_toggle.isChecked(),
+            "sr": 22050 if self.preview_quality_combo.currentIndex() == 1 else SAMPLE_RATE,
+        }
+
     def update_tempo(self, value):
         self.tempo = value
         self.tempo_label.setText(f"Tempo: {value} BPM")
 
     def toggle_live_preview(self):
         if self.preview_btn.isChecked():
-            self.audio_stream = sd.OutputStream(samplerate=SAMPLE_RATE, channels=2, dtype='float32')
+            if self._exporting:
+                # export shares the scratch buffers and filter state
+                print("Export in progress - preview disabled until it finishes")
+                self.preview_btn.setChecked(False)
+                return
+            self._snapshot_params()
+            self._active_sr = self._params["sr"]
+            self._filter_state.clear()  # stale state from another rate
+            self._play_buf = None
+            self._play_pos = 0
+            self._producer_running = True
+            self._producer_thread = threading.Thread(target=self._producer, daemon=True)
+            self._producer_thread.start()
+            # pull model: PortAudio paces playback, pulling small blocks
+            # from the chunk queue through _audio_cb
+            self.audio_stream = sd.OutputStream(
+                samplerate=self._active_sr, channels=2, dtype='float32',
+                blocksize=512, latency='low', callback=self._audio_cb)
             self.audio_stream.start()
-            self.timer.start(DURATION_CHUNK*1000)
-            self.stream_chunk()
+            self.timer.start(1000)  # scene-switch tick, GUI thread only
         else:
             self.timer.stop()
+            self._producer_running = False
+            if self._producer_thread is not None:
+                self._producer_thread.join(timeout=1.0)
+                self._producer_thread = None
+            self._chunk_q = queue.Queue(maxsize=4)
             if self.audio_stream:
                 self.audio_stream.stop()
                 self.audio_stream.close()
                 self.audio_stream = None
 
+    def _audio_cb(self, outdata, frames, time_info, status):
+        """PortAudio callback: splice queued chunks into fixed-size blocks."""
+        pos = 0
+        while pos < frames:
+            if self._play_buf is None or self._play_pos >= len(self._play_buf):
+                try:
+                    self._play_buf = self._chunk_q.get_nowait()
+                    self._play_pos = 0
+                    if self._recording:
+                        self._rec_append(self._play_buf)
+                except queue.Empty:
+                    outdata[pos:] = 0.0
+                    return
+            n = min(frames - pos, len(self._play_buf) - self._play_pos)
+            outdata[pos:pos+n] = self._play_buf[self._play_pos:self._play_pos+n]
+            self._play_pos += n
+            pos += n
+
+    def _producer(self):
+        """Generate chunks off the GUI thread, block when the queue is full."""
+        while self._producer_running:
+            # pin the render rate to the rate the stream was opened at:
+            # snapshot updates mid-preview must not change it
+            chunk = self._generate_one_chunk(DURATION_CHUNK, sr=self._active_sr)
+            while self._producer_running:
+                try:
+                    self._chunk_q.put(chunk, timeout=0.2)
+                    break
+                except queue.Full:
+                    continue
+
+    def _rec_append(self, chunk):
+        """Amortized O(1) append into the preallocated recording buffer,
+        doubling its capacity when it fills."""
+        n = chunk.shape[0]
+        if self._rec_pos + n > self._rec_buf.shape[0]:
+            grown = np.empty((max(2 * self._rec_buf.shape[0], self._rec_pos + n), 2), np.float32)
+            grown[:self._rec_pos] = self._rec_buf[:self._rec_pos]
+            self._rec_buf = grown
+        self._rec_buf[self._rec_pos:self._rec_pos + n] = chunk
+        self._rec_pos += n
+
     def toggle_recording(self):
         if self.record_btn.isChecked():
-            self.recording_buffer = []
+            # one flat grow-buffer with a write pointer: no list of chunk
+            # refs and no doubled peak memory from a final concatenate
+            self._rec_pos = 0
+            self._rec_buf = np.empty((60 * self._active_sr, 2), np.float32)
+            self._recording = True
         else:
-            if self.recording_buffer:
-                full_audio = np.concatenate(self.recording_buffer)
+            self._recording = False
+            if self._rec_pos:
                 filename, _ = QFileDialog.getSaveFileName(
                     self, "Save Recording", "", "MP3 Files (*.mp3);;WAV Files (*.wav)"
                 )
                 if filename:
                     if not filename.endswith(".wav") and not filename.endswith(".mp3"):
                         filename += ".wav"
-                    write(filename, SAMPLE_RATE, (full_audio*32767).astype(np.int16))
-                    AudioSegment.from_wav(filename).export(filename.replace('.wav','.mp3'), format='mp3')
+                    # quantize second-by-second into the final int16 buffer:
+                    # no full-length float temporary
+                    total = self._rec_pos
+                    rec = self._rec_buf[:total]
+                    pcm = np.empty((total, 2), np.int16)
+                    scratch = np.empty((self._active_sr, 2), np.float32)
+                    for pos in range(0, total, scratch.shape[0]):
+                        c = rec[pos:pos + scratch.shape[0]]
+                        s = scratch[:c.shape[0]]
+                        np.multiply(c, 32767.0, out=s)
+                        np.rint(s, out=s)
+                        pcm[pos:pos + c.shape[0]] = s
+                    if filename.endswith(".wav"):
+                        write(filename, self._active_sr, pcm)
+                        mp3_name = filename.replace('.wav', '.mp3')
+                    else:
+                        mp3_name = filename
+                    QThreadPool.globalInstance().start(
+                        _Mp3EncodeTask(pcm, mp3_name, self._active_sr))
                     print(f"Recording saved to {filename}")
-                self.recording_buffer = []
+                self._rec_buf = None
+                self._rec_pos = 0
 
-    def stream_chunk(self):
-        dt = DURATION_CHUNK
-        self.time_accumulator += dt
+    def _generate_one_chunk(self, dt, sr=None):
+        """Synthesize one processed chunk. Runs on the producer thread:
+        reads the widget snapshot in self._params, never widgets. Callers
+        pass sr explicitly (the producer pins it to the open stream's
+        rate, export always renders at 44.1 kHz)."""
+        p = self._params
+        if sr is None:
+            sr = self._active_sr
 
-        # --- Scene Switching ---
-        if self.auto_scene_enabled:
-            self.scene_timer += dt
-            if self.scene_timer >= self.scene_duration:
-                self.scene_timer = 0.0
-                self.advance_scene()
+        # one vectorized step advances every LFO lane for this chunk
+        mods = self.lfo_bank.step_all(dt)
 
         # --- Tempo modulation ---
-        if self.evolving_toggle.isChecked():
-            mod_tempo = int(self.tempo + self.lfo_tempo.step(dt))
+        if p["evolving"]:
+            mod_tempo = int(p["tempo"] + mods[LFO_TEMPO])
             mod_tempo = max(mod_tempo, 20)
         else:
-            mod_tempo = self.tempo
+            mod_tempo = p["tempo"]
 
         # --- Generate procedural layers ---
         # Returns a list of 2D numpy arrays: [layer0, layer1, layer2, layer3]
+        n_expect = int(DURATION_CHUNK * sr)
+        if self._layer_bufs[0].shape[0] != n_expect:
+            self._layer_bufs = [np.empty(n_expect, np.float32) for _ in range(4)]
         layers = generate_procedural_chunk(
             DURATION_CHUNK,
             mod_tempo,
-            self.scale_combo.currentText(),
-            self.inst_combo.currentText(),
-            use_arpeggio=self.arpeggio_toggle.isChecked(),
-            return_layers=True  # <-- make sure generator supports multiple layers
+            p["scale"],
+            p["instrument"],
+            use_arpeggio=p["use_arpeggio"],
+            return_layers=True,
+            layer_bufs=self._layer_bufs,
+            sr=sr
         )
 
-        # --- Apply Layer LFOs ---
-        processed_layers = []
+        # --- Mix mono layers straight into the interleaved output: one
+        # fused pass per layer (tremolo envelope, pan, accumulate), no
+        # stereo/stack temporaries and no final transpose ---
+        n = layers[0].shape[0]
+        if self._mix.shape[0] >= n:
+            mix = self._mix[:n]
+            mix[:] = 0.0
+        else:
+            mix = np.zeros((n, 2), np.float32)
+        timbre_active = p["instrument"] in ["fm_sine", "noise_pad"]
         for i, layer in enumerate(layers):
-            lfo = self.layer_lfos[i % len(self.layer_lfos)]  # safety
-            vol_mod = lfo["volume"].step(dt)
-            pan_mod = lfo["pan"].step(dt)
-            timbre_mod = lfo["timbre"].step(dt)
-
-            # Mono mix, volume modulation
-            mono = np.mean(layer, axis=1) * (1 + vol_mod)
-
-            # Pan modulation
-            stereo = apply_pan(mono, pan_mod)
-
-            # Timbre modulation for FM/Noise
-            if self.inst_combo.currentText() in ["fm_sine", "noise_pad"]:
-                stereo *= (1 + 0.2 * timbre_mod)
-
-            processed_layers.append(stereo)
-
-        # --- Mix all layers ---
-        chunk = np.sum(processed_layers, axis=0)
-        chunk = np.clip(chunk, -1, 1)
+            lane = LFO_LAYER0 + 3 * (i % 4)  # volume, pan, timbre triplet
+            vol_env = self.lfo_bank.block(lane, 1.0 / sr, n)
+            pan_mod = mods[lane + 1]
+            timbre_mod = mods[lane + 2]
+            vol_env += 1.0
+            scale = (1 + 0.2 * timbre_mod) if timbre_active else 1.0
+            gl = scale * (1 - pan_mod) * 0.5
+            gr = scale * (1 + pan_mod) * 0.5
+            mix_add(mix, layer, vol_env, gl, gr)
+        chunk = np.clip(mix, -1, 1, out=mix)
 
         # --- Apply global evolving effects ---
-        if self.evolving_toggle.isChecked():
-            reverb_amount = min(max(self.reverb_slider.value()/100 + self.lfo_reverb.step(dt),0),1)
-            delay_amount = min(max(self.delay_slider.value()/100 + self.lfo_delay.step(dt),0),1)
-            chorus_amount = min(max(self.chorus_slider.value()/100 + self.lfo_chorus.step(dt),0),1)
-            phaser_amount = min(max(self.phaser_slider.value()/100 + self.lfo_phaser.step(dt),0),1)
-            stereo_widen = min(max(self.stereo_slider.value()/100 + self.lfo_stereo.step(dt),0),1)
+        if p["evolving"]:
+            reverb_amount = min(max(p["reverb"] + mods[LFO_REVERB],0),1)
+            delay_amount = min(max(p["delay"] + mods[LFO_DELAY],0),1)
+            chorus_amount = min(max(p["chorus"] + mods[LFO_CHORUS],0),1)
+            phaser_amount = min(max(p["phaser"] + mods[LFO_PHASER],0),1)
+            stereo_widen = min(max(p["stereo_widen"] + mods[LFO_STEREO],0),1)
         else:
-            reverb_amount = self.reverb_slider.value()/100
-            delay_amount = self.delay_slider.value()/100
-            chorus_amount = self.chorus_slider.value()/100
-            phaser_amount = self.phaser_slider.value()/100
-            stereo_widen = self.stereo_slider.value()/100
+            reverb_amount = p["reverb"]
+            delay_amount = p["delay"]
+            chorus_amount = p["chorus"]
+            phaser_amount = p["phaser"]
+            stereo_widen = p["stereo_widen"]
 
         chunk = process_effects(
             chunk,
             reverb_amount=reverb_amount,
             delay_amount=delay_amount,
-            lowpass_cutoff=self.lowpass_slider.value(),
-            highpass_cutoff=self.highpass_slider.value(),
+            lowpass_cutoff=p["lowpass"],
+            highpass_cutoff=p["highpass"],
             chorus_amount=chorus_amount,
             phaser_amount=phaser_amount,
-            stereo_widen=stereo_widen
+            stereo_widen=stereo_widen,
+            scratch=self._fx_scratch[:n] if self._fx_scratch.shape[0] >= n else None,
+            filter_state=self._filter_state,
+            sr=sr
         )
-
-        # --- Playback and Recording ---
-        if self.audio_stream:
-            self.audio_stream.write(chunk.astype(np.float32))
-        if self.record_btn.isChecked():
-            self.recording_buffer.append(chunk)
-
-    def save_preset(self):
-        preset = {
-            "tempo": self.tempo_slider.value(),
-            "scale": self.scale_combo.currentText(),
-            "instrument": self.inst_combo.currentText(),
-            "use_arpeggio": self.arpeggio_toggle.isChecked(),
-            "reverb": self.reverb_slider.value(),
-            "delay": self.delay_slider.value(),
-            "chorus": self.chorus_slider.value(),
-            "phaser": self.phaser_slider.value(),
-            "stereo_widen": self.stereo_slider.value(),
-            "lowpass": self.lowpass_slider.value(),
-            "highpass": self.highpass_slider.value()
-        }
-        filename, _ = QFileDialog.getSaveFileName(self, "Save Preset", "", "JSON Files (*.json)")
-        if filename:
-            if not filename.endswith(".json"):
-                filename += ".json"
-            with open(filename, 'w') as f:
-                json.dump(preset, f, indent=4)
-            print(f"Preset saved to {filename}")
+        # queued chunks must own their memory (scratch and mix get reused)
+        if (chunk is self._fx_scratch or chunk.base is self._fx_scratch
+                or chunk is self._mix or chunk.base is self._mix):
+            chunk = chunk.copy()
+        return chunk.astype(np.float32, copy=False)
+
+    def _scene_tick(self, dt=1.0):
+        """GUI-thread timer tick: scene switching only (touches widgets)."""
+        self.time_accumulator += dt
+        if self.auto_scene_enabled:
+            self.scene_timer += dt
+            if self.scene_timer >= self.scene_duration:
+                self.scene_timer = 0.0
+                self.advance_scene()
 
     def load_preset(self):
         filename, _ = QFileDialog.getOpenFileName(self, "Load Preset", "", "JSON Files (*.json)")
@@ -365,11 +575,20 @@ class ProceduralMusicApp(QWidget):
             self.highpass_slider.setValue(preset.get("highpass",20))
             print(f"Preset loaded from {filename}")
 
+    def _scan_presets(self):
+        """List preset files, re-reading the folder only when its mtime
+        changes (scene advances hit this from the audio schedule)."""
+        mtime = os.stat(PRESET_FOLDER).st_mtime
+        if mtime != self._presets_mtime:
+            with os.scandir(PRESET_FOLDER) as it:
+                self._presets_cache = sorted(e.name for e in it if e.name.endswith(".json"))
+            self._presets_mtime = mtime
+        return self._presets_cache
+
     def refresh_presets(self):
         """Refresh preset dropdown from folder"""
         self.preset_combo.clear()
-        presets = [f for f in os.listdir(PRESET_FOLDER) if f.endswith(".json")]
-        self.preset_combo.addItems(presets)
+        self.preset_combo.addItems(self._scan_presets())
 
     def save_preset(self):
         preset_name, ok = QFileDialog.getSaveFileName(self, "Save Preset", PRESET_FOLDER, "JSON Files (*.json)")
@@ -413,25 +632,25 @@ class ProceduralMusicApp(QWidget):
 
     def generate_random_preset(self):
       """Randomly set all parameters to create a new preset"""
-      tempo = random.randint(40, 160)
-      self.tempo_slider.setValue(tempo)
-
-      scale = random.choice(list(SCALES.keys()))
-      self.scale_combo.setCurrentText(scale)
-
-      instrument = random.choice(INSTRUMENTS)
-      self.inst_combo.setCurrentText(instrument)
-
-      self.arpeggio_toggle.setChecked(random.choice([True, False]))
-
-      self.reverb_slider.setValue(random.randint(0, 100))
-      self.delay_slider.setValue(random.randint(0, 100))
-      self.chorus_slider.setValue(random.randint(0, 100))
-      self.phaser_slider.setValue(random.randint(0, 100))
-      self.stereo_slider.setValue(random.randint(0, 100))
-
-      self.lowpass_slider.setValue(random.randint(5000, 20000))
-      self.highpass_slider.setValue(random.randint(20, 5000))
+      # one batched draw covers every slider plus the three choices
+      vals = self.rng.integers(
+          [40, 0, 0, 0, 0, 0, 5000, 20, 0, 0, 0],
+          [161, 101, 101, 101, 101, 101, 20001, 5001,
+           len(SCALES), len(INSTRUMENTS), 2])
+
+      self.tempo_slider.setValue(int(vals[0]))
+      self.scale_combo.setCurrentText(list(SCALES.keys())[vals[8]])
+      self.inst_combo.setCurrentText(INSTRUMENTS[vals[9]])
+      self.arpeggio_toggle.setChecked(bool(vals[10]))
+
+      self.reverb_slider.setValue(int(vals[1]))
+      self.delay_slider.setValue(int(vals[2]))
+      self.chorus_slider.setValue(int(vals[3]))
+      self.phaser_slider.setValue(int(vals[4]))
+      self.stereo_slider.setValue(int(vals[5]))
+
+      self.lowpass_slider.setValue(int(vals[6]))
+      self.highpass_slider.setValue(int(vals[7]))
 
       print("Random preset generated")
 
@@ -449,7 +668,7 @@ class ProceduralMusicApp(QWidget):
 
     def load_scene_list(self):
         """Load all presets in the folder as scenes"""
-        self.scenes = [os.path.join(PRESET_FOLDER, f) for f in os.listdir(PRESET_FOLDER) if f.endswith(".json")]
+        self.scenes = [os.path.join(PRESET_FOLDER, f) for f in self._scan_presets()]
         self.current_scene_index = 0
 
     def advance_scene(self):
@@ -471,38 +690,17 @@ class ProceduralMusicApp(QWidget):
     def generate_random_scene(self):
         """Generate a fully random preset scene and apply it"""
         self.generate_random_preset()  # Reuse existing random preset generator
-        # Optional: randomize LFOs for more dynamic evolution
-        for i, lfo in enumerate(self.layer_lfos):
-            lfo["volume"].rate = random.uniform(0.0005, 0.005)
-            lfo["volume"].amplitude = random.uniform(0.1, 0.5)
-            lfo["pan"].rate = random.uniform(0.0002, 0.003)
-            lfo["pan"].amplitude = random.uniform(0.3, 0.7)
-            lfo["timbre"].rate = random.uniform(0.0001, 0.003)
-            lfo["timbre"].amplitude = random.uniform(0.1, 0.5)
-
-        # Randomize global LFOs
-        self.lfo_tempo.rate = random.uniform(0.002, 0.01)
-        self.lfo_tempo.amplitude = random.uniform(5, 25)
-        self.lfo_reverb.rate = random.uniform(0.001, 0.005)
-        self.lfo_reverb.amplitude = random.uniform(0.2, 0.6)
-        self.lfo_delay.rate = random.uniform(0.001, 0.005)
-        self.lfo_delay.amplitude = random.uniform(0.2, 0.6)
-        self.lfo_chorus.rate = random.uniform(0.0005, 0.003)
-        self.lfo_chorus.amplitude = random.uniform(0.1, 0.5)
-        self.lfo_phaser.rate = random.uniform(0.0005, 0.003)
-        self.lfo_phaser.amplitude = random.uniform(0.1, 0.5)
-        self.lfo_stereo.rate = random.uniform(0.0005, 0.003)
-        self.lfo_stereo.amplitude = random.uniform(0.1, 0.5)
+        # Randomize every LFO lane with two batched draws
+        self.lfo_bank.retune_all(self.rng.uniform(_LFO_FREQ_LO, _LFO_FREQ_HI),
+                                 self.rng.uniform(_LFO_DEPTH_LO, _LFO_DEPTH_HI))
 
         print("Procedural random scene generated")
 
     def export_full_session(self):
+        if self._producer_running or self._exporting:
+            print("Stop playback / wait for the running export first")
+            return
         total_duration = self.session_duration_slider.value()
-        chunk_duration = DURATION_CHUNK
-        num_chunks = int(total_duration / chunk_duration)
-        session_audio = []
-
-        print(f"Exporting full session: {total_duration}s ({num_chunks} chunks)")
 
         # Save dialog
         filename, _ = QFileDialog.getSaveFileName(
@@ -513,95 +711,57 @@ class ProceduralMusicApp(QWidget):
         if not (filename.endswith(".wav") or filename.endswith(".mp3")):
             filename += ".wav"
 
-        # Reset scene timer and index
+        # Reset scene timer and snapshot the widgets for the worker
         self.scene_timer = 0.0
-        current_scene_idx = self.current_scene_index
+        self._snapshot_params()
+        self._exporting = True
+        worker = _ExportWorker(self._run_export, filename, total_duration)
+        worker.signals.scene.connect(self.advance_scene)
+        worker.signals.progress.connect(self._on_export_progress)
+        worker.signals.finished.connect(self._on_export_done)
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_export_progress(self, pct):
+        self.setWindowTitle(f"Cinematic Procedural Ambient DAW - exporting {pct}%")
+
+    def _on_export_done(self, filename):
+        self._exporting = False
+        self.setWindowTitle("Cinematic Procedural Ambient DAW")
+        print(f"Session exported as {filename}")
 
-        for i in range(num_chunks):
-            # --- Scene switching ---
-            if self.auto_scene_enabled and (i * chunk_duration) % self.scene_duration == 0:
-                self.scene_timer = 0.0
-                self.advance_scene()
+    def _run_export(self, signals, filename, total_duration):
+        """Worker-thread body: renders the session through the same
+        _generate_one_chunk path as live playback, streaming each chunk
+        to disk or into ffmpeg. Widgets are only touched via signals."""
+        num_chunks = int(total_duration / DURATION_CHUNK)
+        print(f"Exporting full session: {total_duration}s ({num_chunks} chunks)")
 
-            # --- Tempo modulation for export ---
-            if self.evolving_toggle.isChecked():
-                mod_tempo = int(self.tempo + self.lfo_tempo.step(chunk_duration))
-                mod_tempo = max(mod_tempo, 20)
-            else:
-                mod_tempo = self.tempo
-
-            # --- Generate procedural layers ---
-            layers = generate_procedural_chunk(
-                chunk_duration,
-                mod_tempo,
-                self.scale_combo.currentText(),
-                self.inst_combo.currentText(),
-                use_arpeggio=self.arpeggio_toggle.isChecked(),
-                return_layers=True
-            )
-
-            # --- Apply Layer LFOs ---
-            processed_layers = []
-            for j, layer in enumerate(layers):
-                lfo = self.layer_lfos[j % len(self.layer_lfos)]
-                vol_mod = lfo["volume"].step(chunk_duration)
-                pan_mod = lfo["pan"].step(chunk_duration)
-                timbre_mod = lfo["timbre"].step(chunk_duration)
-
-                mono = np.mean(layer, axis=1) * (1 + vol_mod)
-                stereo = apply_pan(mono, pan_mod)
-
-                if self.inst_combo.currentText() in ["fm_sine", "noise_pad"]:
-                    stereo *= (1 + 0.2 * timbre_mod)
-
-                processed_layers.append(stereo)
-
-            # --- Mix layers ---
-            chunk = np.sum(processed_layers, axis=0)
-            chunk = np.clip(chunk, -1, 1)
-
-            # --- Apply global evolving effects ---
-            if self.evolving_toggle.isChecked():
-                reverb_amount = min(max(self.reverb_slider.value()/100 + self.lfo_reverb.step(chunk_duration),0),1)
-                delay_amount = min(max(self.delay_slider.value()/100 + self.lfo_delay.step(chunk_duration),0),1)
-                chorus_amount = min(max(self.chorus_slider.value()/100 + self.lfo_chorus.step(chunk_duration),0),1)
-                phaser_amount = min(max(self.phaser_slider.value()/100 + self.lfo_phaser.step(chunk_duration),0),1)
-                stereo_widen = min(max(self.stereo_slider.value()/100 + self.lfo_stereo.step(chunk_duration),0),1)
+        if filename.endswith(".mp3"):
+            sink = _mp3_pipe(filename)
+            writer = None
+        else:
+            writer = sf.SoundFile(filename, 'w', SAMPLE_RATE, 2, 'PCM_16')
+            sink = None
+
+        for i in range(num_chunks):
+            # scene advancing touches widgets, so hand it to the GUI
+            # thread; the next snapshot picks up the new scene
+            if self.auto_scene_enabled and (i * DURATION_CHUNK) % self.scene_duration == 0:
+                signals.scene.emit()
+
+            chunk = self._generate_one_chunk(DURATION_CHUNK, sr=SAMPLE_RATE)
+            if writer is not None:
+                writer.write(chunk)
             else:
-                reverb_amount = self.reverb_slider.value()/100
-                delay_amount = self.delay_slider.value()/100
-                chorus_amount = self.chorus_slider.value()/100
-                phaser_amount = self.phaser_slider.value()/100
-                stereo_widen = self.stereo_slider.value()/100
-
-            chunk = process_effects(
-                chunk,
-                reverb_amount=reverb_amount,
-                delay_amount=delay_amount,
-                lowpass_cutoff=self.lowpass_slider.value(),
-                highpass_cutoff=self.highpass_slider.value(),
-                chorus_amount=chorus_amount,
-                phaser_amount=phaser_amount,
-                stereo_widen=stereo_widen
-            )
-
-            session_audio.append(chunk)
-
-        # --- Concatenate all chunks ---
-        full_audio = np.concatenate(session_audio)
-        full_audio = np.clip(full_audio, -1, 1)
-
-        # --- Save WAV ---
-        write(filename, SAMPLE_RATE, (full_audio*32767).astype(np.int16))
-        print(f"Session exported as {filename}")
+                sink.stdin.write((chunk * 32767).astype(np.int16).tobytes())
+            signals.progress.emit(int(100 * (i + 1) / num_chunks))
 
-        # --- Optional: convert to MP3 ---
-        if filename.endswith(".wav"):
-            try:
-                AudioSegment.from_wav(filename).export(filename.replace(".wav", ".mp3"), format="mp3")
-                print(f"MP3 version saved: {filename.replace('.wav','.mp3')}")
-            except:
-                print("pydub not installed or failed, MP3 conversion skipped")
+        if writer is not None:
+            writer.close()
+        else:
+            sink.stdin.close()
+            sink.wait()
+        signals.finished.emit(filename)
 
 
 if __name__=="__main__":
@@ -1,5 +1,12 @@
 import numpy as np
-from audio_utils import generate_tone, generate_noise, apply_envelope, apply_pan, midi_to_freq
+from audio_utils import generate_noise, apply_pan, midi_to_freq, synth_note, FREQ_LUT
+
+# PCG64 stream: integer/uniform draws run well ahead of the legacy
+# np.random RandomState equivalents
+_RNG = np.random.default_rng()
+
+_ARP_STYLES = ('up', 'down', 'random')
+_NOTE_LENGTHS = np.array([0.5, 1.0, 1.5])
 
 SCALES = {
     'major':[0,2,4,5,7,9,11,12],
@@ -9,77 +16,106 @@ SCALES = {
 }
 
 def chord_inversion(chord, inversion=0):
-    return chord[inversion:] + chord[:inversion]
+    # left-rotate; works for lists too and avoids the two-slice
+    # concatenation allocating intermediate lists
+    return np.roll(chord, -inversion)
 
-def generate_arpeggio(chord, duration, instrument='sine', volume=0.05, style='up', tempo=60):
+def generate_arpeggio(chord, duration, instrument='sine', volume=0.05, style='up', tempo=60, out=None, sr=44100):
     beats = int(duration/60*tempo)
     n_notes = len(chord)
-    arpeggio_audio = np.zeros(int(duration*44100),dtype=np.float32)
+    beat_dur = 60/tempo
+    spb = int(sr*beat_dur)
+    # out is the destination window (e.g. a slice of the chord layer):
+    # notes land there directly, no per-arpeggio temporary buffer
+    if out is None:
+        out = np.zeros(int(duration*sr),dtype=np.float32)
     if style=='up':
-        order=list(range(n_notes))
+        order=np.arange(n_notes)
     elif style=='down':
-        order=list(reversed(range(n_notes)))
+        order=np.arange(n_notes-1,-1,-1)
     else:
-        order=np.random.permutation(n_notes)
-    for i,note in enumerate(order*(beats//n_notes+1)):
-        start_idx=int(i*44100*60/tempo)
-        end_idx=start_idx+int(60/tempo*44100)
-        freq=midi_to_freq(note)
-        tone=generate_tone(freq,60/tempo,instrument,volume)
-        tone=apply_envelope(tone,0.02,0.3)
-        arpeggio_audio[start_idx:end_idx]+=tone[:len(arpeggio_audio[start_idx:end_idx])]
-    return arpeggio_audio
+        order=_RNG.permutation(n_notes)
+    # np.tile repeats the pattern; the old list-multiply silently did an
+    # elementwise multiply for the 'random' (ndarray) style
+    for i,idx in enumerate(np.tile(order,beats//n_notes+1)):
+        # order holds chord positions, so look the pitch up through the
+        # chord - the old code fed the position itself to midi_to_freq,
+        # playing subsonic MIDI notes 0..2
+        freq=midi_to_freq(int(chord[idx]))
+        synth_note(out,i*spb,freq,beat_dur,instrument,volume,0.02,0.3,sr=sr)
+    return out
 
-def generate_procedural_chunk(duration, tempo, scale='minor', instrument='sine', use_arpeggio=True, return_layers=False):
+def generate_procedural_chunk(duration, tempo, scale='minor', instrument='sine', use_arpeggio=True, return_layers=False, out=None, layer_bufs=None, sr=44100):
     beats=int(duration/60*tempo)
-    audio=np.zeros(int(duration*44100),dtype=np.float32)
+    n_samples=int(duration*sr)
     scale_notes=SCALES[scale]
+    scale_arr=np.asarray(scale_notes)
+    # layer_bufs lets a streaming caller hand in four persistent mono
+    # buffers instead of paying four fresh allocations per chunk
+    if layer_bufs is not None and layer_bufs[0].shape[0]==n_samples:
+        drone,chords,melody,noise_buf=layer_bufs
+        drone.fill(0.0)
+        chords.fill(0.0)
+        melody.fill(0.0)
+    else:
+        drone=np.zeros(n_samples,dtype=np.float32)
+        chords=np.zeros(n_samples,dtype=np.float32)
+        melody=np.zeros(n_samples,dtype=np.float32)
+        noise_buf=None
+    # per-beat constants hoisted out of the loops: one int multiply per
+    # beat instead of repeated float arithmetic and int() casts
+    beat_dur=60/tempo
+    spb=int(sr*beat_dur)
+
+    # each layer draws its whole beat schedule up front (one vectorized
+    # RNG call per decision) and then synthesizes only the active beats
 
     # Drone layer
-    for i in range(beats):
-        if np.random.rand()<0.8:
-            root=48+np.random.choice(scale_notes)
-            freq=midi_to_freq(root)
-            start_idx=int(i*44100*60/tempo)
-            end_idx=start_idx+int(44100*60/tempo)
-            tone=generate_tone(freq,60/tempo,instrument,0.08)
-            tone=apply_envelope(tone,0.3,0.7)
-            audio[start_idx:end_idx]+=tone[:len(audio[start_idx:end_idx])]
+    gates=_RNG.random(beats)<0.8
+    roots=48+scale_arr[_RNG.integers(0,scale_arr.shape[0],size=beats)]
+    freqs=FREQ_LUT[roots]  # one gather for the whole schedule
+    for i in np.nonzero(gates)[0]:
+        synth_note(drone,i*spb,freqs[i],beat_dur,instrument,0.08,0.3,0.7,sr=sr)
 
     # Chord layer with inversions/arpeggio
-    for i in range(beats//2):
-        if np.random.rand()<0.7:
-            root=60+np.random.choice(scale_notes)
-            chord=[root, root+scale_notes[2], root+scale_notes[4]]
-            inversion=np.random.randint(0,len(chord))
-            chord=chord_inversion(chord,inversion)
-            start_idx=int(i*2*44100*60/tempo)
-            end_idx=start_idx+int(2*44100*60/tempo)
-            if use_arpeggio:
-                arp_style=np.random.choice(['up','down','random'])
-                arp_audio=generate_arpeggio(chord,2*60/tempo,instrument,0.05,arp_style,tempo)
-                audio[start_idx:end_idx]+=arp_audio[:len(audio[start_idx:end_idx])]
-            else:
-                for note in chord:
-                    freq=midi_to_freq(note)
-                    tone=generate_tone(freq,2*60/tempo,instrument,0.05)
-                    tone=apply_envelope(tone,0.5,0.5)
-                    audio[start_idx:end_idx]+=tone[:len(audio[start_idx:end_idx])]
+    n_chords=beats//2
+    gates=_RNG.random(n_chords)<0.7
+    roots=60+scale_arr[_RNG.integers(0,scale_arr.shape[0],size=n_chords)]
+    inversions=_RNG.integers(0,3,size=n_chords)
+    arp_styles=_RNG.integers(0,len(_ARP_STYLES),size=n_chords)
+    for i in np.nonzero(gates)[0]:
+        root=int(roots[i])
+        chord=np.array([root, root+scale_notes[2], root+scale_notes[4]],dtype=np.int16)
+        chord=chord_inversion(chord,int(inversions[i]))
+        start_idx=i*2*spb
+        if use_arpeggio:
+            n=min(2*spb,n_samples-start_idx)
+            generate_arpeggio(chord,2*beat_dur,instrument,0.05,_ARP_STYLES[arp_styles[i]],tempo,out=chords[start_idx:start_idx+n],sr=sr)
+        else:
+            for note in chord:
+                synth_note(chords,start_idx,midi_to_freq(note),2*beat_dur,instrument,0.05,0.5,0.5,sr=sr)
 
     # Melody layer
-    for i in range(beats):
-        if np.random.rand()<0.3:
-            note=60+np.random.choice(scale_notes)
-            freq=midi_to_freq(note)
-            start_idx=int(i*44100*60/tempo)
-            dur_note=60/tempo*np.random.choice([0.5,1,1.5])
-            end_idx=start_idx+int(dur_note*44100)
-            tone=generate_tone(freq,dur_note,instrument,0.07)
-            tone=apply_envelope(tone,0.05,0.5)
-            audio[start_idx:end_idx]+=tone[:len(audio[start_idx:end_idx])]
+    gates=_RNG.random(beats)<0.3
+    notes=60+scale_arr[_RNG.integers(0,scale_arr.shape[0],size=beats)]
+    freqs=FREQ_LUT[notes]
+    durs=beat_dur*_NOTE_LENGTHS[_RNG.integers(0,3,size=beats)]
+    for i in np.nonzero(gates)[0]:
+        synth_note(melody,i*spb,freqs[i],durs[i],instrument,0.07,0.05,0.5,sr=sr)
 
     # Noise layer
-    audio+=generate_noise(duration,0.02)
-    audio=np.clip(audio,-1,1)
-    pan=np.random.uniform(-0.5,0.5)
-    return apply_pan(audio,pan)
+    noise=generate_noise(duration,0.02,out=noise_buf,sr=sr)
+
+    if return_layers:
+        # mono layers: the caller pans and mixes, so a stereo expansion
+        # here would only get folded straight back down. Tone layers
+        # saturate at write time inside synth_note; only the raw noise
+        # still needs a clamp
+        np.clip(noise,-1,1,out=noise)
+        return [drone,chords,melody,noise]
+
+    audio=drone+chords+melody+noise
+    audio=np.clip(audio,-1,1,out=audio)
+    pan=_RNG.uniform(-0.5,0.5)
+    # out lets a streaming caller reuse one (n_samples,2) stereo buffer
+    return apply_pan(audio,pan,out=out)